@@ -12,21 +12,80 @@ Usage:
     python3 scripts/fix-spotbugs-issues.py vajrapulse-core
 """
 
+import os
 import re
+import shutil
 import sys
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import List, Dict
-from dataclasses import dataclass
+from typing import Iterator, List, Dict, Optional, Tuple, Union
+from dataclasses import dataclass, field
+
+# Compiled once at import time so every parse/fix call reuses the same pattern.
+# Report pattern: Bug type, class, method, file, line
+_BUG_RE = re.compile(
+    r'Bug type ([A-Z_]+).*?In class ([^\s<]+).*?In method ([^\s<]+).*?At ([^:]+\.java):\[line (\d+)\]',
+    re.DOTALL
+)
+
+# Literal every finding in the report starts with
+_BUG_MARKER = 'Bug type '
+
+# Size of each block read from the report
+_IO_BUFFER_SIZE = 64 * 1024
+
+# Fewest findings worth fanning out to worker processes; below this, starting
+# the pool and pickling batches costs more than fixing the files inline
+_PARALLEL_MIN_FINDINGS = 1000
+
+# Record Map accessor: public Map<...> fieldName() { return fieldName; }
+# The backreference ties the returned field to the accessor name, so a single
+# pattern serves every field instead of compiling one regex per finding.
+# The 'ret' group locates the return statement for an in-place splice.
+_ACCESSOR_RE = re.compile(
+    r'public\s+java\.util\.Map<[^>]+>\s+(?P<field>\w+)\(\)\s*\{[^}]*(?P<ret>return\s+(?P=field);)[^}]*\}'
+)
+
+# Line terminator, used to index line-start offsets of a source file
+_NEWLINE_RE = re.compile(r'\n')
+
+# Leading indentation of a line
+_INDENT_RE = re.compile(r'[ \t]*')
+
+# Method or constructor header: visibility modifier, parameter list, optional
+# throws clause, then end of line or the opening brace of the body
+_METHOD_RE = re.compile(
+    r'^\s*(?:@\w+(?:\([^)]*\))?\s+)*(public|private|protected)\b[^;=]*\([^;]*?\)\s*(?:throws\s[^;{]*)?(?:\{.*)?$'
+)
+
+def _write_atomic(path: Union[str, Path], data: bytes) -> None:
+    """Write data to a sibling temp file in one call, then rename it over path."""
+    tmp = os.fspath(path) + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    if os.path.exists(path):
+        shutil.copymode(path, tmp)
+    os.replace(tmp, path)
 
 @dataclass
 class SpotBugsFinding:
     """Represents a SpotBugs finding."""
+    # No per-instance __dict__: reports can hold thousands of findings, and
+    # each one is pickled to a worker process
+    __slots__ = ('bug_type', 'class_name', 'method_name', 'file_path', 'line_number')
+    
     bug_type: str
     class_name: str
     method_name: str
     file_path: str
     line_number: int
-    description: str
+    
+    @property
+    def description(self) -> str:
+        return f"{self.bug_type} in {self.class_name}.{self.method_name}"
 
 class SpotBugsReportParser:
     """Parses SpotBugs HTML reports."""
@@ -41,27 +100,133 @@ class SpotBugsReportParser:
             print(f"Report not found: {self.report_path}")
             return []
         
-        with open(self.report_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Extract bug patterns from HTML
-        # Pattern: Bug type, class, method, file, line
-        pattern = r'Bug type ([A-Z_]+).*?In class ([^\s<]+).*?In method ([^\s<]+).*?At ([^:]+\.java):\[line (\d+)\]'
-        
-        matches = re.finditer(pattern, content, re.DOTALL)
-        
-        for match in matches:
-            finding = SpotBugsFinding(
-                bug_type=match.group(1),
-                class_name=match.group(2),
-                method_name=match.group(3),
-                file_path=match.group(4),
-                line_number=int(match.group(5)),
-                description=f"{match.group(1)} in {match.group(2)}.{match.group(3)}"
-            )
-            self.findings.append(finding)
-        
+        self.findings.extend(self.iter_findings())
         return self.findings
+    
+    def iter_findings(self) -> Iterator[SpotBugsFinding]:
+        """
+        Stream findings from the raw report, one marker-delimited shard at a time.
+        
+        Each shard runs from one 'Bug type ' marker up to the next, so the
+        regex never runs across findings and only the finding being read is
+        buffered. Blocks without a marker cost one substring search and are
+        dropped, so a clean build's report is rejected in a single read.
+        """
+        keep = len(_BUG_MARKER) - 1
+        pending = ''
+        with open(self.report_path, 'r', encoding='utf-8') as f:
+            for block in iter(lambda: f.read(_IO_BUFFER_SIZE), ''):
+                pending += block
+                pos = 0
+                while True:
+                    start = pending.find(_BUG_MARKER, pos)
+                    if start < 0:
+                        # Keep only what could be the start of a split marker
+                        pending = pending[max(pos, len(pending) - keep):]
+                        break
+                    
+                    end = pending.find(_BUG_MARKER, start + 1)
+                    shard = pending[start:end] if end >= 0 else pending[start:]
+                    match = _BUG_RE.match(shard)
+                    if match:
+                        yield self._finding(match)
+                        pos = start + match.end()
+                    elif end >= 0 or len(shard) > _IO_BUFFER_SIZE:
+                        # Complete (or implausibly long) shard that is not a finding
+                        pos = start + len(_BUG_MARKER)
+                    else:
+                        # The finding may continue in the next block
+                        pending = pending[start:]
+                        break
+    
+    def _finding(self, match) -> SpotBugsFinding:
+        """Build a finding from a _BUG_RE match."""
+        return SpotBugsFinding(
+            bug_type=match.group(1),
+            class_name=match.group(2),
+            method_name=match.group(3),
+            file_path=match.group(4),
+            line_number=int(match.group(5))
+        )
+
+@dataclass
+class SourceFile:
+    """
+    A Java source loaded once and shared by every fix applied to it.
+    
+    The text is held as one string indexed by line-boundary offsets rather
+    than a list of line strings. Fixes never mutate it: they record edits
+    against the original offsets, applied in a single pass on render, so
+    report line numbers and the method index stay valid for every finding.
+    """
+    path: str
+    text: str
+    bounds: List[int]
+    # Line terminator of the file, used for inserted lines
+    newline: str = '\n'
+    edits: Dict[int, Tuple[int, str]] = field(default_factory=dict)
+    
+    @classmethod
+    def read(cls, path: str) -> 'SourceFile':
+        """Load a file with one read and index where each line starts."""
+        with open(path, 'rb') as f:
+            text = f.read().decode('utf-8')
+        bounds = [0, *(m.end() for m in _NEWLINE_RE.finditer(text))]
+        if bounds[-1] != len(text):
+            bounds.append(len(text))
+        crlf = len(bounds) > 1 and text[bounds[1] - 2:bounds[1]] == '\r\n'
+        return cls(path=path, text=text, bounds=bounds, newline='\r\n' if crlf else '\n')
+    
+    @property
+    def line_count(self) -> int:
+        return len(self.bounds) - 1
+    
+    @property
+    def modified(self) -> bool:
+        return bool(self.edits)
+    
+    def offset(self, line_idx: int) -> int:
+        """Offset of the first character of a line (or end of text)."""
+        return self.bounds[min(line_idx, self.line_count)]
+    
+    def line(self, line_idx: int) -> str:
+        """Text of a line, including its line terminator."""
+        return self.text[self.bounds[line_idx]:self.bounds[line_idx + 1]]
+    
+    def iter_lines(self) -> Iterator[str]:
+        """Yield lines one at a time without materializing a list."""
+        for line_idx in range(self.line_count):
+            yield self.line(line_idx)
+    
+    def edit(self, start: int, end: int, replacement: str) -> bool:
+        """Record replacing text[start:end]; False if that span is already edited."""
+        if start in self.edits:
+            return False
+        self.edits[start] = (end, replacement)
+        return True
+    
+    def render(self) -> str:
+        """Return the text with all recorded edits applied."""
+        parts = []
+        pos = 0
+        for start in sorted(self.edits):
+            end, replacement = self.edits[start]
+            parts.append(self.text[pos:start])
+            parts.append(replacement)
+            pos = end
+        parts.append(self.text[pos:])
+        return ''.join(parts)
+
+@dataclass
+class SourceIndex:
+    """Structure of a source file gathered by one scan and shared by all fixers."""
+    starts: List[int]
+    spans: List[Tuple[int, int]]
+    accessors: Dict[str, Tuple[int, int]]
+    is_record: bool
+    # Offset just past the last import line (-1 if none), for new imports
+    import_end: int
+    imports_collections: bool
 
 class BugFixer:
     """Automatically fixes common SpotBugs issues."""
@@ -70,110 +235,86 @@ class BugFixer:
         self.project_root = project_root
         self.fixes_applied = []
         self.manual_review_needed = []
+        # Plain strings: sources are resolved with os.path, not Path objects
+        self._project_root_str = str(project_root)
+        self._index: Dict[str, SourceIndex] = {}
     
-    def fix_rv_return_value_ignored(self, finding: SpotBugsFinding) -> bool:
+    def fix_rv_return_value_ignored(self, source: SourceFile, finding: SpotBugsFinding) -> bool:
         """
         Fix RV_RETURN_VALUE_IGNORED_BAD_PRACTICE.
         
         For executor.submit(), we can suppress the warning with @SuppressWarnings
         or store the Future if needed. For fire-and-forget, suppression is appropriate.
         """
-        file_path = self.project_root / finding.file_path
-        if not file_path.exists():
-            return False
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
         line_idx = finding.line_number - 1
-        if line_idx >= len(lines):
+        if line_idx >= source.line_count:
             return False
         
-        line = lines[line_idx]
+        line = source.line(line_idx)
         
         # Check if it's executor.submit() call
         if 'executor.submit(' in line or '.submit(' in line:
             # Add @SuppressWarnings annotation before the line
             # Find the method containing this line
-            method_start = self._find_method_start(lines, line_idx)
+            method_start = self._find_method_start(source, line_idx)
             if method_start >= 0:
                 # Check if method already has @SuppressWarnings
-                has_suppress = any('@SuppressWarnings' in lines[i] 
-                                  for i in range(method_start, line_idx + 1))
+                block = source.text[source.offset(method_start):source.offset(line_idx + 1)]
+                has_suppress = '@SuppressWarnings' in block
                 
                 if not has_suppress:
                     # Add @SuppressWarnings before method
-                    indent = self._get_indent(lines[method_start])
-                    suppress_line = f"{indent}@SuppressWarnings(\"RV_RETURN_VALUE_IGNORED_BAD_PRACTICE\")\n"
-                    lines.insert(method_start, suppress_line)
-                    
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.writelines(lines)
+                    indent = self._get_indent(source.line(method_start))
+                    suppress_line = f"{indent}@SuppressWarnings(\"RV_RETURN_VALUE_IGNORED_BAD_PRACTICE\"){source.newline}"
+                    insert_pos = source.offset(method_start)
+                    if not source.edit(insert_pos, insert_pos, suppress_line):
+                        # Another finding in this method already added it
+                        return False
                     
                     self.fixes_applied.append(f"Added @SuppressWarnings for {finding.description}")
                     return True
         
         return False
     
-    def fix_ei_expose_rep(self, finding: SpotBugsFinding) -> bool:
+    def fix_ei_expose_rep(self, source: SourceFile, finding: SpotBugsFinding) -> bool:
         """
         Fix EI_EXPOSE_REP - exposing mutable representation.
         
         For record fields that return Map, we should return Collections.unmodifiableMap()
         """
-        file_path = self.project_root / finding.file_path
-        if not file_path.exists():
-            return False
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        index = self._source_index(source)
         
         # Check if it's a record
-        if 'public record' not in content:
+        if not index.is_record:
             return False
         
         # Find the accessor method for the field
         field_name = finding.method_name.replace('()', '')
         
-        # Pattern: public Map<...> fieldName() { return fieldName; }
-        pattern = rf'public\s+java\.util\.Map<[^>]+>\s+{re.escape(field_name)}\(\)\s*\{{[^}}]*return\s+{re.escape(field_name)};[^}}]*\}}'
-        
-        match = re.search(pattern, content, re.MULTILINE | re.DOTALL)
-        if match:
-            # Replace with Collections.unmodifiableMap()
-            old_return = f"return {field_name};"
+        ret = index.accessors.get(field_name)
+        if ret:
+            # Replace this accessor's return with Collections.unmodifiableMap()
             new_return = f"return java.util.Collections.unmodifiableMap({field_name});"
             
-            content = content.replace(old_return, new_return)
-            
-            # Add import if needed
-            if 'import java.util.Collections;' not in content:
-                # Find last import statement
-                import_pattern = r'(import\s+[^;]+;\n)'
-                imports = list(re.finditer(import_pattern, content))
-                if imports:
-                    last_import = imports[-1]
-                    insert_pos = last_import.end()
-                    content = content[:insert_pos] + 'import java.util.Collections;\n' + content[insert_pos:]
+            if not source.edit(ret[0], ret[1], new_return):
+                return False
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # Add import if needed, after the last import statement
+            if not index.imports_collections and index.import_end >= 0:
+                # Already recorded if another accessor in this file was fixed
+                source.edit(index.import_end, index.import_end, f'import java.util.Collections;{source.newline}')
             
             self.fixes_applied.append(f"Fixed EI_EXPOSE_REP for {finding.description} - wrapped Map in Collections.unmodifiableMap()")
             return True
         
         return False
     
-    def fix_ei_expose_rep2(self, finding: SpotBugsFinding) -> bool:
+    def fix_ei_expose_rep2(self, source: SourceFile, finding: SpotBugsFinding) -> bool:
         """
         Fix EI_EXPOSE_REP2 - storing mutable reference in constructor.
         
         For record constructors, we should create defensive copies.
         """
-        file_path = self.project_root / finding.file_path
-        if not file_path.exists():
-            return False
-        
         # This is trickier - records have compact constructors
         # We need to add a canonical constructor that creates defensive copies
         # For now, mark as manual review
@@ -183,42 +324,121 @@ class BugFixer:
         )
         return False
     
-    def _find_method_start(self, lines: List[str], line_idx: int) -> int:
-        """Find the start of the method containing the given line."""
-        # Look backwards for method declaration
-        brace_count = 0
-        for i in range(line_idx, -1, -1):
-            line = lines[i]
-            brace_count += line.count('}')
-            brace_count -= line.count('{')
+    # Fixer for each supported bug type; add an entry here to support a new one
+    _HANDLERS = {
+        'RV_RETURN_VALUE_IGNORED_BAD_PRACTICE': fix_rv_return_value_ignored,
+        'EI_EXPOSE_REP': fix_ei_expose_rep,
+        'EI_EXPOSE_REP2': fix_ei_expose_rep2,
+    }
+    
+    def _load(self, file_path: str) -> Optional[SourceFile]:
+        """Read a source file once for all of its findings."""
+        path = os.path.join(self._project_root_str, file_path)
+        if not os.path.exists(path):
+            return None
+        
+        return SourceFile.read(path)
+    
+    def _save(self, source: SourceFile) -> None:
+        """Write a modified source file back in one write, replacing it atomically."""
+        _write_atomic(source.path, source.render().encode('utf-8'))
+        self._index.pop(source.path, None)
+    
+    def _source_index(self, source: SourceFile) -> SourceIndex:
+        """Return the cached structural index of a source file."""
+        index = self._index.get(source.path)
+        if index is None:
+            index = self._scan(source)
+            self._index[source.path] = index
+        return index
+    
+    def _scan(self, source: SourceFile) -> SourceIndex:
+        """
+        Index a source file in one forward pass over its lines.
+        
+        Records the (start, end) line span of every method, ordered by start
+        line; nested methods (e.g. in anonymous classes) get their own span
+        inside the enclosing one. Map accessors are matched only within their
+        own span as it closes, and import and record declarations are noted
+        on the way, so no fixer needs a separate scan of the file.
+        """
+        spans: List[Tuple[int, int]] = []
+        accessors: Dict[str, Tuple[int, int]] = {}
+        is_record = False
+        import_end = -1
+        imports_collections = False
+        # Open methods as [start line, depth before header, body opened]
+        stack: List[list] = []
+        depth = 0
+        
+        for i, line in enumerate(source.iter_lines()):
+            if line.startswith('import '):
+                if line.endswith('\n'):
+                    import_end = source.offset(i + 1)
+                if line.startswith('import java.util.Collections;'):
+                    imports_collections = True
             
-            if 'public' in line or 'private' in line or 'protected' in line:
-                if '(' in line and ')' in line and brace_count <= 0:
-                    return i
+            # Every header has a parameter list; skip the regex for other lines
+            if '(' in line:
+                if 'public record' in line:
+                    is_record = True
+                if _METHOD_RE.match(line):
+                    stack.append([i, depth, False])
+            
+            opens = line.count('{')
+            depth += opens - line.count('}')
+            if stack and opens:
+                stack[-1][2] = True
+            
+            while stack and stack[-1][2] and depth <= stack[-1][1]:
+                start, _, _ = stack.pop()
+                spans.append((start, i))
+                
+                if 'java.util.Map<' in source.line(start):
+                    match = _ACCESSOR_RE.search(source.text, source.offset(start), source.offset(i + 1))
+                    if match:
+                        accessors.setdefault(match.group('field'), match.span('ret'))
+        
+        spans.sort()
+        return SourceIndex(
+            starts=[start for start, _ in spans],
+            spans=spans,
+            accessors=accessors,
+            is_record=is_record,
+            import_end=import_end,
+            imports_collections=imports_collections
+        )
+    
+    def _find_method_start(self, source: SourceFile, line_idx: int) -> int:
+        """Find the start of the method containing the given line."""
+        index = self._source_index(source)
+        
+        # Innermost method starting at or before the line that still encloses it
+        i = bisect_right(index.starts, line_idx) - 1
+        while i >= 0 and index.spans[i][1] < line_idx:
+            i -= 1
         
-        return -1
+        return index.spans[i][0] if i >= 0 else -1
     
     def _get_indent(self, line: str) -> str:
         """Get the indentation of a line."""
-        return line[:len(line) - len(line.lstrip())]
+        return _INDENT_RE.match(line).group(0)
     
-    def fix_all(self, findings: List[SpotBugsFinding]) -> Dict[str, int]:
-        """Fix all findings that can be automatically fixed."""
+    def fix_file(self, file_path: str, findings: List[SpotBugsFinding]) -> Dict[str, int]:
+        """Fix all findings in one source file, reading and writing it once."""
         stats = {
             'fixed': 0,
             'manual_review': 0,
             'skipped': 0
         }
         
+        source = self._load(file_path)
+        
         for finding in findings:
             fixed = False
-            
-            if finding.bug_type == 'RV_RETURN_VALUE_IGNORED_BAD_PRACTICE':
-                fixed = self.fix_rv_return_value_ignored(finding)
-            elif finding.bug_type == 'EI_EXPOSE_REP':
-                fixed = self.fix_ei_expose_rep(finding)
-            elif finding.bug_type == 'EI_EXPOSE_REP2':
-                fixed = self.fix_ei_expose_rep2(finding)
+            handler = self._HANDLERS.get(finding.bug_type)
+            if source is not None and handler is not None:
+                fixed = handler(self, source, finding)
             
             if fixed:
                 stats['fixed'] += 1
@@ -227,8 +447,67 @@ class BugFixer:
             else:
                 stats['skipped'] += 1
         
+        if source is not None and source.modified:
+            self._save(source)
+        
+        return stats
+    
+    def fix_all(self, findings: List[SpotBugsFinding]) -> Dict[str, int]:
+        """Fix all findings that can be automatically fixed."""
+        stats = {
+            'fixed': 0,
+            'manual_review': 0,
+            'skipped': 0
+        }
+        
+        # Group by file so each source is read and written once; findings with
+        # no fixer are skipped without opening their file
+        by_file: Dict[str, List[SpotBugsFinding]] = defaultdict(list)
+        for finding in findings:
+            if finding.bug_type not in self._HANDLERS:
+                stats['skipped'] += 1
+                continue
+            by_file[finding.file_path].append(finding)
+        
+        # Files are independent, so fan them out across processes when there
+        # is more than one CPU to use and enough work to pay for the pool
+        workers = min(os.cpu_count() or 1, len(by_file))
+        if workers > 1 and sum(map(len, by_file.values())) >= _PARALLEL_MIN_FINDINGS:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    _fix_one_file, repeat(type(self)), by_file.keys(), by_file.values(),
+                    repeat(self.project_root)
+                ))
+            for result in results:
+                for key, count in result.stats.items():
+                    stats[key] += count
+                self.fixes_applied.extend(result.fixes_applied)
+                self.manual_review_needed.extend(result.manual_review_needed)
+        else:
+            for path, file_findings in by_file.items():
+                for key, count in self.fix_file(path, file_findings).items():
+                    stats[key] += count
+        
         return stats
 
+@dataclass
+class FileFixResult:
+    """Outcome of fixing one source file, returned from worker processes."""
+    stats: Dict[str, int]
+    fixes_applied: List[str]
+    manual_review_needed: List[str]
+
+def _fix_one_file(fixer_cls: type, file_path: str, findings: List[SpotBugsFinding],
+                  project_root: Path) -> FileFixResult:
+    """Fix one file's findings with a fresh fixer_cls (module-level so it pickles)."""
+    fixer = fixer_cls(project_root)
+    stats = fixer.fix_file(file_path, findings)
+    return FileFixResult(
+        stats=stats,
+        fixes_applied=fixer.fixes_applied,
+        manual_review_needed=fixer.manual_review_needed
+    )
+
 def main():
     """Main entry point."""
     project_root = Path(__file__).parent.parent
@@ -251,9 +530,11 @@ def main():
         return 0
     
     print(f"📋 Found {len(findings)} SpotBugs findings:")
-    for finding in findings:
-        print(f"   - {finding.bug_type}: {finding.class_name}.{finding.method_name} "
-              f"({finding.file_path}:{finding.line_number})")
+    # One write per list rather than one print per finding
+    sys.stdout.write('\n'.join(
+        f"   - {f.bug_type}: {f.class_name}.{f.method_name} ({f.file_path}:{f.line_number})"
+        for f in findings
+    ) + '\n')
     
     print("\n🔧 Attempting automatic fixes...")
     print("=" * 70)
@@ -269,13 +550,11 @@ def main():
     
     if fixer.fixes_applied:
         print("\n📝 Fixes applied:")
-        for fix in fixer.fixes_applied:
-            print(f"   ✓ {fix}")
+        sys.stdout.write('\n'.join(f"   ✓ {fix}" for fix in fixer.fixes_applied) + '\n')
     
     if fixer.manual_review_needed:
         print("\n⚠️  Manual review required:")
-        for item in fixer.manual_review_needed:
-            print(f"   • {item}")
+        sys.stdout.write('\n'.join(f"   • {item}" for item in fixer.manual_review_needed) + '\n')
     
     print("\n" + "=" * 70)
     print("💡 Next steps:")